@@ -1,7 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import openpyxl
+import xlsxwriter
 import re
 import io
+import csv
+import math
+import uuid
+from collections import defaultdict
 
 st.set_page_config(layout="wide")
 
@@ -17,28 +24,111 @@ st.markdown("""
 
 # === Helper Functions ===
 
-def generate_next_id(hierarchy):
+# A node's "parents" and "children" are dicts used as insertion-ordered sets
+# (keys are element ids, values are None): no duplicates, O(1) membership,
+# and the first parent stays the primary one.
+
+_ID_RE = re.compile(r"([a-zA-Z]+)-(\d+)")
+
+def set_hierarchy(hierarchy):
+    st.session_state["hierarchy"] = hierarchy
+    # The token keeps cache entries of concurrent sessions apart, the version
+    # is bumped on every mutation so cached results never go stale.
+    st.session_state["hier_token"] = uuid.uuid4().hex
+    st.session_state["hier_version"] = 0
+    # Scan the ids once, new ids then come from a monotonic counter
+    st.session_state["id_prefix"], max_number = max_numeric_id(hierarchy)
+    st.session_state["next_seq"] = max_number + 1
+    # Upper bound on parents per node, sizes the export's parent columns
+    st.session_state["max_parents"] = max((len(data["parents"]) for data in hierarchy.values()), default=0)
+
+def hierarchy_version():
+    return st.session_state["hier_token"], st.session_state["hier_version"]
+
+def bump_hierarchy_version():
+    st.session_state["hier_version"] += 1
+
+def generate_next_id():
+    seq = st.session_state["next_seq"]
+    st.session_state["next_seq"] = seq + 1
+    return f"{st.session_state['id_prefix']}-{seq}"
+
+def max_numeric_id(hierarchy):
     numeric_ids = []
     for eid in hierarchy:
-        match = re.search(r"([a-zA-Z]+)-(\d+)", eid)
+        # Fast path for plain "prefix-number" ids, the regex handles everything else
+        prefix, _, number = eid.rpartition("-")
+        if number.isdecimal() and prefix.isascii() and prefix.isalpha():
+            numeric_ids.append((prefix, int(number)))
+            continue
+        match = _ID_RE.search(eid)
         if match:
             prefix, number = match.groups()
             numeric_ids.append((prefix, int(number)))
     if numeric_ids:
-        max_prefix, max_number = max(numeric_ids, key=lambda x: x[1])
-        return f"{max_prefix}-{max_number + 1}"
+        return max(numeric_ids, key=lambda x: x[1])
     else:
-        return "z-1"
-
-def load_csv(uploaded_file):
-    df = pd.read_excel(uploaded_file)
-    return df
+        return "z", 0
+
+def load_rows(file_bytes):
+    # Read-only mode streams the rows without loading styles into memory
+    wb = openpyxl.load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        # The stored <dimension> tag can be stale or missing, read the actual cells instead
+        ws.reset_dimensions()
+        rows = list(ws.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+    # Drop trailing blank rows, then bring every row to the same width
+    # (trailing blank cells trimmed, shorter rows padded), like pd.read_excel
+    rows = [list(row) for row in rows]
+    for row in rows:
+        while row and row[-1] is None:
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    width = max(map(len, rows), default=0)
+    return [row + [None] * (width - len(row)) for row in rows]
+
+# Keyed on the file contents, so re-uploading the same workbook is free
+@st.cache_data(show_spinner="جارٍ تحليل الملف…", max_entries=4)
+def load_hierarchy(file_bytes):
+    # The file is parsed once, its header row tells a table from an outline
+    rows = load_rows(file_bytes)
+    if rows and is_table_header(rows[0]):
+        return build_hierarchy(rows_to_table(rows))
+    return build_hierarchy_from_outline(pd.DataFrame(rows))
+
+def is_table_header(row):
+    return {"الرقم التعريفي", "المدخل", "النوع"}.issubset(row)
+
+def rows_to_table(rows):
+    # First row is the header, like pd.read_excel
+    header = [col if col is not None else f"Unnamed: {i}" for i, col in enumerate(rows[0])]
+
+    # Repeated names become "X.1", "X.2", ... skipping names already in the header
+    counts = defaultdict(int)
+    for i, col in enumerate(header):
+        base = col
+        count = counts[base]
+        while count > 0:
+            counts[base] = count + 1
+            col = f"{base}.{count}"
+            count = count + 1 if col in header else counts[col]
+        header[i] = col
+        counts[col] = count + 1
+    return pd.DataFrame(rows[1:], columns=header)
+
+def strip_text(column):
+    # Vectorized strip, non-text cells come back as missing
+    try:
+        return column.str.strip()
+    except AttributeError:  # The column holds no text at all
+        return pd.Series(None, index=column.index, dtype=object)
 
 def build_hierarchy_from_outline(df):
-    hierarchy = {}
-    id_counter = 1
-    node_stack = {}  # Track last seen node at each level
-
     type_map = {
         0: "باب رئيس",  # Top-level category
         1: "فصل",       # Section
@@ -46,75 +136,96 @@ def build_hierarchy_from_outline(df):
         3: "مدخل",      # Entry
     }
 
-    for _, row in df.iterrows():
-        for col_idx, cell in enumerate(row):
-            if pd.notna(cell) and isinstance(cell, str) and len(cell.strip()) > 0:
-                node_name = cell.strip()
-
-                # Try to get a definition from the next column
-                definition = ""
-                if col_idx + 1 < len(row) and isinstance(row[col_idx + 1], str):
-                    definition = row[col_idx + 1].strip()
-
-                node_id = f"N{id_counter}"
-                id_counter += 1
-
-                # Determine parent: the closest node in a previous column
-                parents = []
-                for i in reversed(range(col_idx)):
-                    if i in node_stack:
-                        parents = [node_stack[i]]
-                        break
-                
-                # Assign the type based on column index
-                node_type = type_map.get(col_idx, "غير معروف")
-
-                # Add node to hierarchy
-                hierarchy[node_id] = {
-                    "name": node_name,
-                    "type": node_type,
-                    "definition": definition,
-                    "parents": parents,
-                    "children": [],
-                }
-
-                # Add this node to the stack at its level
-                node_stack[col_idx] = node_id
-
-    # Add children references
-    for eid, data in hierarchy.items():
-        for pid in data["parents"]:
-            if pid in hierarchy:
-                hierarchy[pid]["children"].append(eid)
-
-    return hierarchy
+    # Stripped text of every cell, "" for blanks and non-text cells
+    text = df.apply(strip_text).to_numpy(dtype=object)
+    text = np.where(pd.notna(text), text, "")
+    n_cols = text.shape[1]
+    is_node = text != ""
+
+    # Nodes are numbered in reading order (row by row, left to right)
+    rows, cols = np.nonzero(is_node)
+    node_nums = np.arange(1, len(rows) + 1)
+    node_grid = np.zeros(text.shape, dtype=np.int64)
+    node_grid[rows, cols] = node_nums
+
+    # Last node seen in each column up to each row, and the closest column to the left holding one
+    last_node = np.maximum.accumulate(node_grid, axis=0)
+    last_col = np.maximum.accumulate(np.where(last_node > 0, np.arange(n_cols), -1), axis=1)
+
+    # Parent: the closest node in a previous column
+    parent_cols = np.where(cols > 0, last_col[rows, np.maximum(cols - 1, 0)], -1)
+    parent_nums = np.where(parent_cols >= 0, last_node[rows, np.maximum(parent_cols, 0)], 0)
+
+    # Definition: the text of the next column, if any
+    next_text = text[rows, np.minimum(cols + 1, n_cols - 1)]
+    definitions = np.where(cols + 1 < n_cols, next_text, "")
+
+    # Collect (id, node) pairs and build the dict once at the end
+    nodes = []
+    for num, name, col_idx, definition, parent_num in zip(
+        node_nums.tolist(), text[rows, cols].tolist(), cols.tolist(), definitions.tolist(), parent_nums.tolist()
+    ):
+        node_id = f"N{num}"
+        parents = {}
+        if parent_num:
+            # Parents always come earlier in reading order, link the child right away
+            parent_id, parent = nodes[parent_num - 1]
+            parents[parent_id] = None
+            parent["children"][node_id] = None
+
+        nodes.append((node_id, {
+            "name": name,
+            "type": type_map.get(col_idx, "غير معروف"),
+            "definition": definition,
+            "parents": parents,
+            "children": {},
+        }))
+
+    return dict(nodes)
 
 def build_hierarchy(df):
-    hierarchy = {}
-    for _, row in df.iterrows():
-        element_id = str(row["الرقم التعريفي"]) # Ensure ID is string for consistent keys
-        parent_ids = [str(row[col]) for col in df.columns if col.startswith("علاقة جزء من كل") and pd.notna(row[col])]
-        hierarchy[element_id] = {
-            "name": row["المدخل"],
-            "type": row["النوع"],
-            "definition": row.get("الشرح", ""),
-            "parents": parent_ids,
-            "children": [],
-        }
-
-    # Assign children
-    for eid, data in hierarchy.items():
-        for parent in data["parents"]:
-            if parent in hierarchy:
-                hierarchy[parent]["children"].append(eid)
-    return hierarchy
+    parent_cols = [col for col in df.columns if isinstance(col, str) and col.startswith("علاقة جزء من كل")]
+
+    ids = df["الرقم التعريفي"].to_numpy().astype(str).tolist()  # Ensure ID is string for consistent keys
+    names = df["المدخل"].to_numpy().tolist()
+    types = df["النوع"].to_numpy().tolist()
+    definitions = df["الشرح"].to_numpy().tolist() if "الشرح" in df.columns else [""] * len(df)
+
+    # Flatten the non-empty parent cells row by row, then cut them back into per-row lists
+    parent_cells = df[parent_cols].to_numpy(dtype=object)
+    present = pd.notna(parent_cells)
+    parent_ids = np.split(parent_cells[present].astype(str), np.cumsum(present.sum(axis=1))[:-1])
+
+    # A parent's children dict is created on first reference, so rows may
+    # name parents that only appear further down the sheet
+    children = defaultdict(dict)
+    nodes = []
+    for element_id, name, type_, definition, parents in zip(ids, names, types, definitions, parent_ids):
+        parents = dict.fromkeys(parents.tolist())
+        for parent in parents:
+            children[parent][element_id] = None
+        nodes.append((element_id, {
+            "name": name,
+            "type": type_,
+            "definition": definition,
+            "parents": parents,
+            "children": children[element_id],
+        }))
+    return dict(nodes)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _get_siblings_cached(hier_version, element_id, _hierarchy):
+    return _get_siblings(_hierarchy, element_id)
 
 def get_siblings(hierarchy, element_id):
+    return _get_siblings_cached(hierarchy_version(), element_id, hierarchy)
+
+def _get_siblings(hierarchy, element_id):
     element = hierarchy[element_id]
-    siblings = set()
+    siblings = {}
     for parent_id in element["parents"]:
         siblings.update(hierarchy[parent_id]["children"])
-    siblings.discard(element_id)
+    siblings.pop(element_id, None)
     return list(siblings)
 
 def add_element(hierarchy, new_id, name, type_, definition, parent_id):
@@ -125,39 +236,74 @@ def add_element(hierarchy, new_id, name, type_, definition, parent_id):
         "name": name,
         "type": type_,
         "definition": definition,
-        "parents": [parent_id] if parent_id else [],
-        "children": [],
+        "parents": {parent_id: None} if parent_id else {},
+        "children": {},
     }
     if parent_id and parent_id in hierarchy:
-        hierarchy[parent_id]["children"].append(new_id)
+        hierarchy[parent_id]["children"][new_id] = None
+    st.session_state["max_parents"] = max(st.session_state["max_parents"], len(hierarchy[new_id]["parents"]))
+    bump_hierarchy_version()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _export_to_csv_cached(hier_version, _hierarchy, max_parents):
+    columns = export_columns(_hierarchy, max_parents)
+    # Plain csv module straight from the columns, no DataFrame or workbook
+    csv_text = io.StringIO()
+    writer = csv.writer(csv_text)
+    writer.writerow(columns)
+    writer.writerows(
+        [None if isinstance(value, float) and math.isnan(value) else value for value in row]
+        for row in zip(*columns.values())
+    )
+    # The BOM lets Excel detect UTF-8 and display the Arabic text correctly
+    return csv_text.getvalue().encode("utf-8-sig")
 
 def export_to_csv(hierarchy):
-    rows = []
-    max_parents = 0
-    if "hierarchy" in st.session_state and st.session_state["hierarchy"]:
-        max_parents = max(len(data["parents"]) for data in st.session_state["hierarchy"].values())
-
-    all_parent_cols = [f"علاقة جزء من كل {i+1}" for i in range(max_parents)]
-    
-    base_cols = ["الرقم التعريفي", "المدخل", "الشرح", "النوع"]
-    final_cols = base_cols + [col for col in all_parent_cols if col not in base_cols]
+    return _export_to_csv_cached(hierarchy_version(), hierarchy, st.session_state["max_parents"])
 
+def export_columns(hierarchy, max_parents):
+    # Fill the columns directly in a single pass, no per-row dicts
+    ids, names, definitions, types = [], [], [], []
+    parent_cols = [[] for _ in range(max_parents)]
     for eid, data in hierarchy.items():
-        row = {
-            "الرقم التعريفي": eid,
-            "المدخل": data["name"],
-            "الشرح": data["definition"],
-            "النوع": data["type"],
-        }
-        for col in all_parent_cols:
-            row[col] = None
+        ids.append(eid)
+        names.append(data["name"])
+        definitions.append(data["definition"])
+        types.append(data["type"])
+        parents = list(data["parents"])
+        parents += [None] * (max_parents - len(parents))
+        for col, parent in zip(parent_cols, parents):
+            col.append(parent)
+
+    columns = {
+        "الرقم التعريفي": ids,
+        "المدخل": names,
+        "الشرح": definitions,
+        "النوع": types,
+    }
+    for i, col in enumerate(parent_cols):
+        columns[f"علاقة جزء من كل {i+1}"] = col
+    return columns
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _export_to_excel_cached(hier_version, _hierarchy, max_parents):
+    export_df = pd.DataFrame(export_columns(_hierarchy, max_parents))
+    # Missing values become blank cells, xlsxwriter rejects NaN
+    export_df = export_df.astype(object).where(export_df.notna(), None)
+
+    # constant_memory streams each row to disk once the next one starts, so
+    # rows must be written in order (pandas' to_excel writes column by column)
+    excel_bytes = io.BytesIO()
+    workbook = xlsxwriter.Workbook(excel_bytes, {"constant_memory": True})
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, export_df.columns, workbook.add_format({"bold": True}))
+    for row_idx, row in enumerate(export_df.itertuples(index=False), start=1):
+        worksheet.write_row(row_idx, 0, row)
+    workbook.close()
+    return excel_bytes.getvalue()
 
-        for i, parent in enumerate(data["parents"]):
-            if i < max_parents:
-                row[f"علاقة جزء من كل {i+1}"] = parent
-        rows.append(row)
-        
-    return pd.DataFrame(rows, columns=final_cols)
+def export_to_excel(hierarchy):
+    return _export_to_excel_cached(hierarchy_version(), hierarchy, st.session_state["max_parents"])
 
 # RTL Subheader Helper
 def rtl_subheader(text):
@@ -208,7 +354,6 @@ def render_add_form(context_label, parent_id, auto_type, form_key_suffix):
     with st.expander(f"➕ إضافة عنصر ك{context_label} {icon}", expanded=False):
 
         with st.form(unique_form_key):
-            new_id = generate_next_id(st.session_state["hierarchy"])
             new_name = st.text_input("🏷️ الاسم", key=f"name_{unique_form_key}")
             # st.markdown(f"<p style='text-align: right; direction: rtl'><strong>📌 الرقم التعريفي:</strong> {new_id}</p>", unsafe_allow_html=True)
             st.markdown(f"<p style='text-align: right; direction: rtl'><strong>📂 النوع:</strong> {auto_type}</p>", unsafe_allow_html=True)
@@ -224,6 +369,7 @@ def render_add_form(context_label, parent_id, auto_type, form_key_suffix):
 
             submitted = st.form_submit_button("إضافة")
             if submitted:
+                new_id = generate_next_id()
                 add_element(st.session_state["hierarchy"], new_id, new_name, auto_type, new_def, parent_id)
                 st.session_state.show_add_success = True
                 st.rerun()
@@ -251,7 +397,7 @@ def render_batch_madkhal_form(parent_id, form_key_suffix):
             if submitted:
                 names = [name.strip() for name in names_input.split("\n") if name.strip()]
                 for name in names:
-                    new_id = generate_next_id(st.session_state["hierarchy"])
+                    new_id = generate_next_id()
                     add_element(
                         st.session_state["hierarchy"],
                         new_id,
@@ -263,78 +409,15 @@ def render_batch_madkhal_form(parent_id, form_key_suffix):
                 st.success(f"تمت إضافة {len(names)} مدخل.")
                 st.rerun()
 
-if "show_add_success" in st.session_state and st.session_state.show_add_success:
-    st.toast("تم إضافة العنصر الجديد ✅", icon="➕")
-    st.session_state.show_add_success = False  # reset
-
-if "show_edit_success" in st.session_state and st.session_state.show_edit_success:
-    st.toast("تم تعديل العنصر بنجاح ✅", icon="✏️")
-    st.session_state.show_edit_success = False  # reset
-
-if "show_delete_success" in st.session_state and st.session_state.show_delete_success:
-    st.toast("تم حذف العنصر بنجاح ✅", icon="🗑️")
-    st.session_state.show_delete_success = False  # reset
-
-
-
-# === Streamlit UI ===
-st.markdown(f"<h2 style='text-align: right; direction: rtl'>{"🧱 بناء وتصفح التسلسل الهرمي للمفاهيم"}</h2>", unsafe_allow_html=True)
-
-# # File Upload
-# uploaded_file = st.sidebar.file_uploader("📤 تحميل ملف CSV", type=["xlsx", "tsv"])
-# if uploaded_file and "hierarchy" not in st.session_state:
-#     df = load_csv(uploaded_file)
-#     hierarchy = build_hierarchy(df)
-#     st.session_state["hierarchy"] = hierarchy
-#     st.session_state["uploaded_filename"] = uploaded_file.name
-#     st.session_state["current_id"] = next((eid for eid, d in hierarchy.items() if not d["parents"]), None)
-#     st.toast("✅ تم تحميل الملف بنجاح!", icon="📁")
-
-st.sidebar.markdown("### 🚀 ابدأ مشروعك")
-
-# Option to start new project or import existing
-project_choice = st.sidebar.radio(
-    "اختر طريقة البدء:",
-    ["📂 تحميل ملف موجود", "🆕 بدء مشروع جديد"]
-)
-
-# Handle new project start
-if project_choice == "🆕 بدء مشروع جديد" and "hierarchy" not in st.session_state:
-    with st.sidebar.form("new_project_form"):
-        root_name = st.text_input("📌 اسم الباب الرئيسي", value="باب رئيسي")
-        submitted = st.form_submit_button("ابدأ المشروع")
-        if submitted:
-            new_id = "br-1"  # default starting ID
-            st.session_state["hierarchy"] = {
-                new_id: {
-                    "name": root_name,
-                    "type": "باب رئيسي",
-                    "definition": "",
-                    "parents": [],
-                    "children": [],
-                }
-            }
-            st.session_state["current_id"] = new_id
-            st.toast("✅ تم بدء مشروع جديد!", icon="🆕")
-            st.rerun()
-
-# Handle file upload if selected
-if project_choice == "📂 تحميل ملف موجود":
-    uploaded_file = st.sidebar.file_uploader("📤 تحميل ملف Excel", type=["xlsx"])
-    if uploaded_file and "hierarchy" not in st.session_state:
-        df = load_csv(uploaded_file)
-        try:
-            hierarchy = build_hierarchy(df)
-        except:
-            df = pd.read_excel(uploaded_file, header=None)
-            hierarchy = build_hierarchy_from_outline(df)
-        st.session_state["hierarchy"] = hierarchy
-        st.session_state["uploaded_filename"] = uploaded_file.name
-        st.session_state["current_id"] = next((eid for eid, d in hierarchy.items() if not d["parents"]), None)
-        st.toast("✅ تم تحميل الملف بنجاح!", icon="📁")
-        st.rerun()
+def navigate_to(element_id):
+    st.session_state["current_id"] = element_id
 
-if "hierarchy" in st.session_state:
+# Current element with its edit/delete controls and navigation panels.
+# Navigation buttons switch the element in their callback, so clicking one
+# only reruns this fragment; edits, additions and deletions still rerun the
+# whole app so the export reflects them.
+@st.fragment
+def render_element_view():
     hierarchy = st.session_state["hierarchy"]
     current_id = st.session_state["current_id"]
     current = hierarchy[current_id]
@@ -347,7 +430,8 @@ if "hierarchy" in st.session_state:
     )
 
     type_part = f"<strong>النوع:</strong> {current['type']}"
-    definition_part = f"&nbsp; | &nbsp; <strong>الشرح:</strong> {current['definition']}" if type(current.get("definition")) == str and current.get("definition") != "" else ""
+    definition = current.get("definition")
+    definition_part = f"&nbsp; | &nbsp; <strong>الشرح:</strong> {definition}" if isinstance(definition, str) and definition else ""
     st.markdown(
         f"<p style='text-align: right; direction: rtl'>{type_part} {definition_part}</p>",
         unsafe_allow_html=True
@@ -367,21 +451,23 @@ if "hierarchy" in st.session_state:
                 st.session_state["hierarchy"][current_id]["name"] = new_name
                 if current["type"] == "مدخل":
                     st.session_state["hierarchy"][current_id]["definition"] = new_def
+                bump_hierarchy_version()
                 st.session_state.show_edit_success = True
                 st.rerun()
     # Check if the current element has children
-    has_children = any(el.get("parent") == current_id for el in st.session_state["hierarchy"].values())
+    has_children = bool(current["children"])
 
     # Delete section
     if not has_children:
         if st.button("🗑️ حذف هذا العنصر", key=f"delete_button_{current_id}"):
-            parent_id = st.session_state["hierarchy"][current_id]["parents"][0]
-            # Remove current_id from its parent's children list
-            if parent_id in st.session_state["hierarchy"]:
-                parent_children = st.session_state["hierarchy"][parent_id].get("children", [])
-                if current_id in parent_children:
-                    parent_children.remove(current_id)
+            parents = st.session_state["hierarchy"][current_id]["parents"]
+            parent_id = next(iter(parents))
+            # Remove current_id from its parents' children
+            for pid in parents:
+                if pid in st.session_state["hierarchy"]:
+                    st.session_state["hierarchy"][pid]["children"].pop(current_id, None)
             del st.session_state["hierarchy"][current_id]
+            bump_hierarchy_version()
             st.session_state["current_id"] = parent_id
             st.session_state.show_delete_success = True
             st.rerun()
@@ -398,10 +484,9 @@ if "hierarchy" in st.session_state:
     ## ⬆️ الأصل
     rtl_subheader("الأصل")
     if current["parents"]:
-        for pid in set(current["parents"]):
-            if st.button(hierarchy[pid]["name"], key=f"parent_nav_{pid}_{current_id}", use_container_width=True):
-                st.session_state["current_id"] = pid
-                st.rerun()
+        for pid in current["parents"]:
+            st.button(hierarchy[pid]["name"], key=f"parent_nav_{pid}_{current_id}", use_container_width=True,
+                      on_click=navigate_to, args=(pid,))
     else:
         st.info("لا يوجد أصل لهذا العنصر.")
 
@@ -410,39 +495,34 @@ if "hierarchy" in st.session_state:
     rtl_subheader("الإخوة")
     siblings = get_siblings(hierarchy, current_id)
     if siblings:
-        for i in range(0, len(siblings), 2):
-            cols = st.columns(2)
-            for j in range(2):
-                if i + j < len(siblings):
-                    sid = siblings[i + j]
-                    if sid not in hierarchy:
-                        continue
-                    if cols[j].button(hierarchy[sid]["name"], key=f"sibling_nav_{sid}_{current_id}", use_container_width=True):
-                        st.session_state["current_id"] = sid
-                        st.rerun()
+        # One two-column layout for the whole grid, buttons alternate between the columns
+        cols = st.columns(2)
+        keys = [f"sibling_nav_{sid}_{current_id}" for sid in siblings]
+        for i, (sid, key) in enumerate(zip(siblings, keys)):
+            if sid not in hierarchy:
+                continue
+            cols[i % 2].button(hierarchy[sid]["name"], key=key, use_container_width=True,
+                               on_click=navigate_to, args=(sid,))
     else:
         st.info("لا يوجد إخوة لهذا العنصر.")
 
     # Single "Add Sibling" button
-    parent_id_for_sibling = current["parents"][0] if current["parents"] else None
+    parent_id_for_sibling = next(iter(current["parents"]), None)
     if parent_id_for_sibling:
         render_add_form("أخ", parent_id_for_sibling, infer_type("sibling", current["type"]), f"{current_id}_sibling_add")
 
     st.divider()
     ## ⬇️ الأبناء
     rtl_subheader("الأبناء")
-    if current["children"]:
-        for i in range(0, len(current["children"]), 2):
-            cols = st.columns(2)
-            for j in range(2):
-                if i + j < len(current["children"]):
-                    cid = current["children"][i + j]
-                    if cid not in hierarchy:
-                        continue
-                    print(cid)
-                    if cols[j].button(hierarchy[cid]["name"], key=f"child_nav_{cid}_{current_id}", use_container_width=True):
-                        st.session_state["current_id"] = cid
-                        st.rerun()
+    children = list(current["children"])
+    if children:
+        cols = st.columns(2)
+        keys = [f"child_nav_{cid}_{current_id}" for cid in children]
+        for i, (cid, key) in enumerate(zip(children, keys)):
+            if cid not in hierarchy:
+                continue
+            cols[i % 2].button(hierarchy[cid]["name"], key=key, use_container_width=True,
+                               on_click=navigate_to, args=(cid,))
     else:
         st.info("لا يوجد أبناء لهذا العنصر.")
 
@@ -453,23 +533,99 @@ if "hierarchy" in st.session_state:
             render_batch_madkhal_form(current_id, f"{current_id}_batch_add")
     else:
         st.info("لا يمكن إضافة ابن إلى مدخل.")
-    
+
+if "show_add_success" in st.session_state and st.session_state.show_add_success:
+    st.toast("تم إضافة العنصر الجديد ✅", icon="➕")
+    st.session_state.show_add_success = False  # reset
+
+if "show_edit_success" in st.session_state and st.session_state.show_edit_success:
+    st.toast("تم تعديل العنصر بنجاح ✅", icon="✏️")
+    st.session_state.show_edit_success = False  # reset
+
+if "show_delete_success" in st.session_state and st.session_state.show_delete_success:
+    st.toast("تم حذف العنصر بنجاح ✅", icon="🗑️")
+    st.session_state.show_delete_success = False  # reset
+
+
+
+# === Streamlit UI ===
+st.markdown(f"<h2 style='text-align: right; direction: rtl'>{"🧱 بناء وتصفح التسلسل الهرمي للمفاهيم"}</h2>", unsafe_allow_html=True)
+
+# # File Upload
+# uploaded_file = st.sidebar.file_uploader("📤 تحميل ملف CSV", type=["xlsx", "tsv"])
+# if uploaded_file and "hierarchy" not in st.session_state:
+#     df = load_csv(uploaded_file)
+#     hierarchy = build_hierarchy(df)
+#     st.session_state["hierarchy"] = hierarchy
+#     st.session_state["uploaded_filename"] = uploaded_file.name
+#     st.session_state["current_id"] = next((eid for eid, d in hierarchy.items() if not d["parents"]), None)
+#     st.toast("✅ تم تحميل الملف بنجاح!", icon="📁")
+
+st.sidebar.markdown("### 🚀 ابدأ مشروعك")
+
+# Option to start new project or import existing
+project_choice = st.sidebar.radio(
+    "اختر طريقة البدء:",
+    ["📂 تحميل ملف موجود", "🆕 بدء مشروع جديد"]
+)
+
+# Handle new project start
+if project_choice == "🆕 بدء مشروع جديد" and "hierarchy" not in st.session_state:
+    with st.sidebar.form("new_project_form"):
+        root_name = st.text_input("📌 اسم الباب الرئيسي", value="باب رئيسي")
+        submitted = st.form_submit_button("ابدأ المشروع")
+        if submitted:
+            new_id = "br-1"  # default starting ID
+            set_hierarchy({
+                new_id: {
+                    "name": root_name,
+                    "type": "باب رئيسي",
+                    "definition": "",
+                    "parents": {},
+                    "children": {},
+                }
+            })
+            st.session_state["current_id"] = new_id
+            st.toast("✅ تم بدء مشروع جديد!", icon="🆕")
+            st.rerun()
+
+# Handle file upload if selected
+if project_choice == "📂 تحميل ملف موجود":
+    uploaded_file = st.sidebar.file_uploader("📤 تحميل ملف Excel", type=["xlsx"])
+    if uploaded_file and "hierarchy" not in st.session_state:
+        hierarchy = load_hierarchy(uploaded_file.getvalue())
+        set_hierarchy(hierarchy)
+        st.session_state["uploaded_filename"] = uploaded_file.name
+        st.session_state["current_id"] = next((eid for eid, d in hierarchy.items() if not d["parents"]), None)
+        st.toast("✅ تم تحميل الملف بنجاح!", icon="📁")
+        st.rerun()
+
+if "hierarchy" in st.session_state:
+    hierarchy = st.session_state["hierarchy"]
+    render_element_view()
+
     st.divider()
     ## 💾 تصدير البيانات
     rtl_subheader("💾 تصدير البيانات")
-    export_df = export_to_csv(hierarchy)
+    export_format = st.radio("صيغة الملف:", ["CSV (سريع)", "Excel"], horizontal=True)
 
-    # Write to in-memory Excel file
-    excel_bytes = io.BytesIO()
-    export_df.to_excel(excel_bytes, index=False, engine="openpyxl")
-    excel_bytes.seek(0)  # Reset pointer to the beginning of the file
-
-    if st.download_button(
+    # Serialized once per hierarchy change, reruns reuse the cached bytes
+    if export_format == "Excel":
+        download = dict(
             label="⬇️ تحميل كملف Excel",
-            data=excel_bytes,
+            data=export_to_excel(hierarchy),
             file_name="hierarchy.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    ):
+        )
+    else:
+        download = dict(
+            label="⬇️ تحميل كملف CSV",
+            data=export_to_csv(hierarchy),
+            file_name="hierarchy.csv",
+            mime="text/csv"
+        )
+
+    if st.download_button(**download):
         st.toast("📤 تم تصدير الملف بنجاح!", icon="✅")
     
     st.divider()